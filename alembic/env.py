@@ -5,7 +5,7 @@ import sys
 from logging.config import fileConfig
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config
 
 # make project root importable so we can import config and models
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -31,29 +31,42 @@ except Exception:
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# import your models metadata
-from models import db  # noqa: E402
 
-target_metadata = db.metadata
+def get_target_metadata():
+    """Import the models metadata only when a run actually needs it"""
+    # models pulls in Flask and SQLAlchemy models; `--sql` script
+    # generation never compares against metadata, so it skips this
+    from models import db
+
+    return db.metadata
 
 
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    context.configure(url=url, target_metadata=None, literal_binds=True)
 
     with context.begin_transaction():
         context.run_migrations()
 
 
 def run_migrations_online():
+    # Keep the default pooled engine so multi-revision upgrades reuse one
+    # connection; SQLite waits on a locked database instead of failing
+    engine_kwargs = {}
+    url = config.get_main_option("sqlalchemy.url") or ""
+    if url.startswith("sqlite"):
+        engine_kwargs["connect_args"] = {"timeout": 30}
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        **engine_kwargs,
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection, target_metadata=get_target_metadata()
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -1,10 +1,19 @@
-from flask import Flask, request, redirect, url_for, flash, render_template
+from flask import Flask, request, redirect, url_for, flash, render_template, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-import io
-import csv
+from sqlalchemy import event, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from collections import namedtuple
 from datetime import datetime, date
+from decimal import Decimal
+from functools import lru_cache
+import base64
+import json
 import os
+import re
+import sqlite3
+import time
 
 
 app = Flask(__name__)
@@ -15,17 +24,396 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-please-c
 basedir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(basedir, 'banking.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Room for every distinct filter/search/pagination statement shape so
+# repeated queries skip SQL compilation (SQLAlchemy's default holds 500)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200}
+# Worker processes for parsing large CSV uploads; 1 keeps imports serial
+app.config['CSV_IMPORT_WORKERS'] = int(os.environ.get('CSV_IMPORT_WORKERS', 1))
+
+# JSON API responses: emit keys in insertion order instead of sorting every dict
+app.json.sort_keys = False
+
+# Keep loaded attributes after commit so redirects/renders don't re-SELECT
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite connections: WAL journal, NORMAL sync, larger page cache"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
 
-db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 from models import define_models
 User, Source, Category, Transaction, RecurringPattern, Account = define_models(db)
 
+_DMY_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+
+def parse_csv_date(value):
+    """Parse a DD/MM/YYYY, YYYY-MM-DD or MM/DD/YYYY date; None if invalid"""
+    # Build common shapes directly; strptime is slow and raises on each miss
+    match = _DMY_DATE_RE.fullmatch(value)
+    if match:
+        day, month, year = map(int, match.groups())
+        try:
+            return date(year, month, day)
+        except ValueError:
+            pass
+        try:
+            return date(year, day, month)  # MM/DD/YYYY
+        except ValueError:
+            pass
+    elif value[4:5] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    for date_format in ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y']:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+# Currency symbol, thousands separators and whitespace removed in one pass
+_AMOUNT_STRIP = str.maketrans('', '', '£,\t ')
+_AMOUNT_START = frozenset('0123456789.-+')
+
+def parse_csv_amount(value):
+    """Parse a stripped CSV amount; None if it is not a number"""
+    # Reject obvious non-numbers up front instead of raising in float()
+    if value[0] not in _AMOUNT_START:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+# Source rows are static lookups; remember their ids by type
+_SOURCE_CACHE = {}
+
+def get_or_create_source(type_, name):
+    """Return the id of the source with this type, creating it if needed"""
+    source_id = _SOURCE_CACHE.get(type_)
+    if source_id is not None:
+        return source_id
+    source = Source.query.filter_by(type=type_).first()
+    if source:
+        _SOURCE_CACHE[type_] = source.id
+        return source.id
+    # Not cached until a later lookup sees it committed, so a rollback
+    # cannot leave a dangling id behind
+    source = Source(name=name, type=type_, is_active=True)
+    db.session.add(source)
+    db.session.flush()
+    return source.id
+
+
+# Categories change rarely but fill a dropdown on several pages. Keep the
+# ordered list for a few minutes; any ORM write to a category clears it.
+# Plain tuples rather than ORM objects, which would outlive their session
+CATEGORY_CACHE_SECONDS = 300
+_CATEGORY_CACHE = {}
+
+CachedCategory = namedtuple('CachedCategory', 'id name type color')
+
+def all_categories():
+    """Every category ordered by name, served from the process-level cache"""
+    cached = _CATEGORY_CACHE.get('all')
+    if cached is not None and time.monotonic() - cached[0] < CATEGORY_CACHE_SECONDS:
+        return cached[1]
+    rows = db.session.execute(
+        db.select(Category.id, Category.name, Category.type, Category.color)
+        .order_by(Category.name)
+    )
+    categories = [CachedCategory(*row) for row in rows]
+    _CATEGORY_CACHE['all'] = (time.monotonic(), categories)
+    return categories
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def clear_category_cache(mapper, connection, target):
+    _CATEGORY_CACHE.clear()
+
+# COUNT(*) for a paged listing scans every matching row; remember the
+# totals per filter for a minute. Any commit may have changed them, so each
+# one clears the cache (writes here are rare next to page views)
+TRANSACTION_COUNT_CACHE_SECONDS = 60
+_TRANSACTION_COUNT_CACHE = {}
+
+def count_transactions(key, *criteria):
+    """Number of transactions matching criteria, cached under key"""
+    cached = _TRANSACTION_COUNT_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < TRANSACTION_COUNT_CACHE_SECONDS:
+        return cached[1]
+    total = db.session.scalar(db.select(db.func.count(Transaction.id)).where(*criteria))
+    if len(_TRANSACTION_COUNT_CACHE) >= 256:
+        # Every distinct search gets a key; don't let them pile up
+        _TRANSACTION_COUNT_CACHE.clear()
+    _TRANSACTION_COUNT_CACHE[key] = (time.monotonic(), total)
+    return total
+
+@event.listens_for(db.session, 'after_commit')
+def clear_transaction_count_cache(session):
+    _TRANSACTION_COUNT_CACHE.clear()
+
+def _json_each_insert(table, keys):
+    """INSERT ... SELECT FROM json_each(:payload) for rows of values in key order"""
+    dialect = db.engine.dialect
+    processors = [table.c[key].type.dialect_impl(dialect).bind_processor(dialect) for key in keys]
+    columns = ', '.join(keys)
+    values = ', '.join(f"json_extract(value, '$[{i}]')" for i in range(len(keys)))
+    statement = db.text(f'INSERT INTO {table.name} ({columns}) SELECT {values} FROM json_each(:payload)')
+
+    def encode(batch):
+        # Bind values exactly as SQLAlchemy would (ISO dates, floats, 0/1)
+        return json.dumps([
+            [value if process is None or value is None else process(value)
+             for process, value in zip(processors, row)]
+            for row in batch
+        ], separators=(',', ':'))
+
+    return statement, encode
+
+def bulk_insert_transactions(rows, batch_size=1000, commit=True):
+    """Insert transaction dicts in batches, committing every batch_size rows.
+
+    On SQLite each batch is one INSERT ... SELECT over json_each() of a
+    single JSON parameter; elsewhere it is an executemany. With
+    commit=False nothing is committed and the caller owns the transaction.
+    """
+    if not rows:
+        return 0
+    table = Transaction.__table__
+    if db.engine.dialect.name != 'sqlite' or sqlite3.sqlite_version_info < (3, 38):
+        insert_stmt = table.insert()
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(insert_stmt, rows[start:start + batch_size])
+            if commit:
+                db.session.commit()
+        return len(rows)
+
+    # Python-side column defaults are not applied to a raw INSERT, so
+    # evaluate the ones the rows leave out once up front
+    row_keys = list(rows[0])
+    default_keys = []
+    defaults = []
+    for column in table.columns:
+        if column.key not in rows[0] and column.default is not None:
+            default_keys.append(column.key)
+            if column.default.is_callable:
+                defaults.append(column.default.arg(None))
+            else:
+                defaults.append(column.default.arg)
+
+    statement, encode = _json_each_insert(table, row_keys + default_keys)
+    for start in range(0, len(rows), batch_size):
+        batch = [
+            [row[key] for key in row_keys] + defaults
+            for row in rows[start:start + batch_size]
+        ]
+        db.session.execute(statement, {'payload': encode(batch)})
+        if commit:
+            db.session.commit()
+    return len(rows)
+
+KeysetPage = namedtuple('KeysetPage', 'items next_cursor prev_cursor')
+
+def encode_cursor(tx):
+    """Opaque cursor for a transaction's (date, id) sort key"""
+    return base64.urlsafe_b64encode(f'{tx.date.isoformat()}|{tx.id}'.encode()).decode()
+
+def decode_cursor(cursor):
+    """(date, id) from a cursor; None if it is missing or malformed"""
+    try:
+        date_str, id_str = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return date.fromisoformat(date_str), int(id_str)
+    except (AttributeError, ValueError):
+        return None
+
+def keyset_paginate(stmt, per_page=20):
+    """Page a transaction query newest first by seeking on (date, id).
+
+    Reads ``cursor`` and ``dir`` from the request; unlike OFFSET the cost
+    does not grow with how deep the page is.
+    """
+    key = tuple_(Transaction.date, Transaction.id)
+    position = decode_cursor(request.args.get('cursor'))
+    backwards = position is not None and request.args.get('dir') == 'prev'
+    if backwards:
+        stmt = stmt.filter(key > position).order_by(Transaction.date, Transaction.id)
+    else:
+        if position is not None:
+            stmt = stmt.filter(key < position)
+        stmt = stmt.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+    # One extra row tells us whether there is another page beyond this one
+    items = db.session.scalars(stmt.limit(per_page + 1)).all()
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, position is not None
+
+    return KeysetPage(
+        items,
+        encode_cursor(items[-1]) if items and has_next else None,
+        encode_cursor(items[0]) if items and has_prev else None,
+    )
+
+def parse_csv_transactions(lines, source_id, imported_at, header=None, first_row=2):
+    """Parse bank export CSV lines into transaction row dicts.
+
+    Returns (rows, errors). Free of request and database state, so it can
+    be run over any iterable of lines. A shard of a larger file passes the
+    file's header and the row number of its first line.
+    """
+    import csv
+
+    csv_input = csv.reader(lines)
+
+    # Locate the columns once; rows are then indexed positionally.
+    # Absent columns point at a padding cell that reads as ''.
+    if header is None:
+        header = next(csv_input, [])
+    columns = {name: i for i, name in enumerate(header)}
+    date_i = columns.get('Transaction Date', len(header))
+    description_i = columns.get('Transaction Description', len(header))
+    credit_i = columns.get('Credit Amount', len(header))
+    debit_i = columns.get('Debit Amount', len(header))
+    row_width = max(date_i, description_i, credit_i, debit_i) + 1
+
+    errors = []
+    rows = []
+
+    # Blank lines are skipped without being numbered
+    for row_num, row in enumerate(filter(None, csv_input), start=first_row):
+        try:
+            if len(row) < row_width:
+                row += [''] * (row_width - len(row))
+
+            # Map CSV columns (adjust these based on your CSV format)
+            transaction_date = row[date_i].strip()
+            description = row[description_i].strip()
+
+            # Parse date (adjust format as needed)
+            if transaction_date:
+                parsed_date = parse_csv_date(transaction_date)
+                if parsed_date is None:
+                    errors.append(f"Row {row_num}: Invalid date format '{transaction_date}'")
+                    continue
+            else:
+                errors.append(f"Row {row_num}: Missing date")
+                continue
+
+            # Parse amount from Credit/Debit columns
+            credit_str = row[credit_i].translate(_AMOUNT_STRIP)
+            debit_str = row[debit_i].translate(_AMOUNT_STRIP)
+            amount = None
+            if credit_str:
+                amount = parse_csv_amount(credit_str)
+                if amount is None:
+                    errors.append(f"Row {row_num}: Invalid credit amount '{credit_str}'")
+                    continue
+            elif debit_str:
+                amount = parse_csv_amount(debit_str)
+                if amount is None:
+                    errors.append(f"Row {row_num}: Invalid debit amount '{debit_str}'")
+                    continue
+                amount = -amount
+            else:
+                errors.append(f"Row {row_num}: Missing amount")
+                continue
+
+            if not description:
+                description = 'Imported transaction'
+
+            rows.append({
+                'date': parsed_date,
+                'description': description,
+                'amount': amount,
+                'source_id': source_id,
+                'source_type': 'csv_import',
+                'created_at': imported_at
+            })
+
+        except Exception as e:
+            errors.append(f"Row {row_num}: {str(e)}")
+            continue
+
+    return rows, errors
+
+# Uploads at least this large per worker are parsed across processes
+PARALLEL_IMPORT_BYTES = 2 * 1024 * 1024
+
+def parse_csv_in_parallel(text, source_id, imported_at, workers):
+    """Parse a large CSV export in worker processes, one shard of records each.
+
+    A csv.reader pass over the text finds where each record ends, and shards
+    are only cut there, so quoted fields spanning several lines stay whole.
+    Shards are contiguous, so results come back in file order with the same
+    row numbers a single pass would report.
+    """
+    import csv
+    import io
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import repeat
+
+    lines = io.StringIO(text, newline=None).readlines()
+    reader = csv.reader(lines)
+    header = next(reader, [])
+    shard_size = -(-(len(lines) - reader.line_num) // workers)
+
+    # Blank records are not numbered, so count them out of each shard's start
+    shards = []
+    first_rows = []
+    shard_start = reader.line_num
+    row_num = 2
+    records = 0
+    for record in reader:
+        if record:
+            records += 1
+        if reader.line_num - shard_start >= shard_size:
+            shards.append(lines[shard_start:reader.line_num])
+            first_rows.append(row_num)
+            row_num += records
+            records = 0
+            shard_start = reader.line_num
+    if shard_start < len(lines):
+        shards.append(lines[shard_start:])
+        first_rows.append(row_num)
+
+    rows = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        for shard_rows, shard_errors in pool.map(
+            parse_csv_transactions,
+            shards,
+            repeat(source_id),
+            repeat(imported_at),
+            repeat(header),
+            first_rows,
+        ):
+            rows.extend(shard_rows)
+            errors.extend(shard_errors)
+    return rows, errors
+
 @app.route('/transactions/import', methods=['GET', 'POST'])
 def import_transactions():
     """Import transactions from CSV file"""
     if request.method == 'POST':
         try:
+            import io
+
             # Check if file was uploaded
             if 'csv_file' not in request.files:
                 flash('No file selected')
@@ -38,16 +426,13 @@ def import_transactions():
 
             if file and file.filename.lower().endswith('.csv'):
                 # Read CSV content
-                import csv
-                import io
+                content = file.stream.read()
+                workers = min(
+                    app.config['CSV_IMPORT_WORKERS'], len(content) // PARALLEL_IMPORT_BYTES
+                )
 
                 # Decode file content
-                stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-                csv_input = csv.DictReader(stream)
-
-                # Process CSV rows
-                imported_count = 0
-                errors = []
+                text = content.decode("UTF8")
 
                 # Get or create CSV import source ONCE before the loop (by name only, due to UNIQUE constraint)
                 csv_source = Source.query.filter_by(name='CSV Import').first()
@@ -60,73 +445,18 @@ def import_transactions():
                     db.session.add(csv_source)
                     db.session.flush()
 
-                for row_num, row in enumerate(csv_input, start=2):  # Start at 2 for header
-                    try:
-                        # Map CSV columns (adjust these based on your CSV format)
-                        transaction_date = row.get('Transaction Date', '').strip()
-                        description = row.get('Transaction Description', '').strip()
-
-                        # Parse date (adjust format as needed)
-                        if transaction_date:
-                            try:
-                                # Try different date formats
-                                for date_format in ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y']:
-                                    try:
-                                        parsed_date = datetime.strptime(transaction_date, date_format).date()
-                                        break
-                                    except ValueError:
-                                        continue
-                                else:
-                                    errors.append(f"Row {row_num}: Invalid date format '{transaction_date}'")
-                                    continue
-                            except:
-                                errors.append(f"Row {row_num}: Could not parse date '{transaction_date}'")
-                                continue
-                        else:
-                            errors.append(f"Row {row_num}: Missing date")
-                            continue
-
-                        # Parse amount from Credit/Debit columns
-                        credit_str = row.get('Credit Amount', '').replace('£', '').replace(',', '').strip()
-                        debit_str = row.get('Debit Amount', '').replace('£', '').replace(',', '').strip()
-                        amount = None
-                        if credit_str:
-                            try:
-                                amount = float(credit_str)
-                            except ValueError:
-                                errors.append(f"Row {row_num}: Invalid credit amount '{credit_str}'")
-                                continue
-                        elif debit_str:
-                            try:
-                                amount = -float(debit_str)
-                            except ValueError:
-                                errors.append(f"Row {row_num}: Invalid debit amount '{debit_str}'")
-                                continue
-                        else:
-                            errors.append(f"Row {row_num}: Missing amount")
-                            continue
-
-                        if not description:
-                            description = 'Imported transaction'
-
-                        # Create transaction
-                        transaction = Transaction(
-                            date=parsed_date,
-                            description=description,
-                            amount=amount,
-                            source_id=csv_source.id,
-                            source_type='csv_import',
-                            created_at=datetime.utcnow()
-                        )
-
-                        db.session.add(transaction)
-                        imported_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        continue
-
-                # Commit all transactions
+                # Process CSV rows, across processes for large files
+                if workers > 1:
+                    rows, errors = parse_csv_in_parallel(
+                        text, csv_source.id, datetime.utcnow(), workers
+                    )
+                else:
+                    stream = io.StringIO(text, newline=None)
+                    rows, errors = parse_csv_transactions(stream, csv_source.id, datetime.utcnow())
+                imported_count = len(rows)
+
+                # Insert the parsed rows in batches (json_each on SQLite)
+                bulk_insert_transactions(rows)
                 db.session.commit()
 
                 # Show results
@@ -165,15 +495,7 @@ def add_transaction():
             transaction_date = datetime.strptime(date_str, '%Y-%m-%d').date()
 
             # Get or create manual entry source
-            manual_source = Source.query.filter_by(type='manual').first()
-            if not manual_source:
-                manual_source = Source(
-                    name='Manual Entry',
-                    type='manual',
-                    is_active=True
-                )
-                db.session.add(manual_source)
-                db.session.flush()
+            manual_source_id = get_or_create_source('manual', 'Manual Entry')
 
             # Create transaction
             transaction = Transaction(
@@ -181,7 +503,7 @@ def add_transaction():
                 description=description,
                 amount=amount,
                 category_id=category_id,
-                source_id=manual_source.id,
+                source_id=manual_source_id,
                 source_type='manual'
             )
 
@@ -196,7 +518,7 @@ def add_transaction():
             flash(f'Error adding transaction: {str(e)}')
 
     # Get categories for dropdown
-    categories = Category.query.order_by(Category.name).all()
+    categories = all_categories()
 
     return render_template('transactions/add.html', categories=categories)
 
@@ -205,46 +527,81 @@ def export_transactions():
     """Export transactions to CSV"""
     try:
         import csv
-        from flask import make_response
-
-        # Get all transactions
-        transactions = Transaction.query.order_by(Transaction.date.desc()).all()
+        import io
+        from flask import Response, stream_with_context
+        from sqlalchemy.orm import joinedload
+
+        # Stream rows in batches rather than materialising every transaction
+        transactions = (
+            Transaction.query.options(
+                joinedload(Transaction.category), joinedload(Transaction.source)
+            )
+            .order_by(Transaction.date.desc())
+            .yield_per(1000)
+        )
 
-        # Create CSV response
-        output = io.StringIO()
-        writer = csv.writer(output)
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
 
-        # Write header
-        writer.writerow([
-            'Date', 'Description', 'Amount', 'Category', 'Source', 'Reference'
-        ])
+            def take():
+                chunk = output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+                return chunk
 
-        # Write transaction data
-        for tx in transactions:
+            # Write header
             writer.writerow([
-                tx.date.strftime('%d/%m/%Y'),
-                tx.description,
-                float(tx.amount),
-                tx.category.name if tx.category else '',
-                tx.source.name if tx.source else '',
-                tx.reference or ''
+                'Date', 'Description', 'Amount', 'Category', 'Source', 'Reference'
             ])
+            yield take()
+
+            # Write transaction data one line at a time
+            for tx in transactions:
+                writer.writerow([
+                    tx.date.strftime('%d/%m/%Y'),
+                    tx.description,
+                    float(tx.amount),
+                    tx.category.name if tx.category else '',
+                    tx.source.name if tx.source else '',
+                    tx.reference or ''
+                ])
+                yield take()
 
         # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=transactions_{date.today().strftime("%Y%m%d")}.csv'
-
-        return response
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={
+                'Content-Disposition': f'attachment; filename=transactions_{date.today().strftime("%Y%m%d")}.csv'
+            }
+        )
 
     except Exception as e:
         flash(f'Export failed: {str(e)}')
         return redirect(url_for('transactions'))
 
+def get_accounts():
+    """All accounts, loaded once per request and shared between callers"""
+    if "_accounts" not in g:
+        # Only the columns the dashboard renders, with owners in one query
+        g._accounts = Account.query.options(
+            load_only(
+                Account.user_id,
+                Account.account_name,
+                Account.account_type,
+                Account.opening_balance,
+                Account.current_balance,
+            ),
+            selectinload(Account.user),
+        ).all()
+    return g._accounts
+
 @app.route("/")
 def dashboard():
-    accounts = Account.query.all()
-    total_balance = sum([a.current_balance or 0 for a in accounts])
+    accounts = get_accounts()
+    # The rows are already loaded for display; sum them without a list
+    total_balance = sum(a.current_balance or 0 for a in accounts)
     return render_template("dashboard.html", accounts=accounts, total_balance=total_balance)
 
 @app.route("/users")
@@ -261,23 +618,53 @@ def add_user():
 
 @app.route("/transactions")
 def transactions():
-    page = request.args.get('page', 1, type=int)
-    transactions = Transaction.query.order_by(Transaction.date.desc()).paginate(page=page, per_page=20)
-    return render_template("transactions/transactions.html", transactions=transactions)
+    # Only hydrate the columns the listing renders (skips raw_data etc.)
+    stmt = db.select(Transaction).options(
+        load_only(
+            Transaction.id,
+            Transaction.date,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.category_id,
+            Transaction.source_id,
+        ),
+        selectinload(Transaction.category),
+        selectinload(Transaction.source),
+    )
+    if app.debug:
+        # Make any lazy load the template triggers fail loudly in development
+        stmt = stmt.options(raiseload('*'))
+    transactions = keyset_paginate(stmt, per_page=20)
+    total = count_transactions('all')
+    return render_template(
+        "transactions/transactions.html", transactions=transactions, total=total
+    )
+
+@lru_cache(maxsize=4096)
+def _fmt_currency(value):
+    # Tables repeat the same amounts a lot; equal numbers format identically
+    return f"£{value:,.2f}"
 
 @app.template_filter('currency')
 def currency_filter(value):
-    try:
-        return f"£{float(value):,.2f}"
-    except (ValueError, TypeError):
-        return value
+    # Type checks rather than try/except: None cells are common and raising
+    # on each one is the slow path
+    if isinstance(value, (int, float, Decimal)):
+        # -0.0, 0 and Decimal('0.00') compare equal and would share one
+        # cache entry; collapse every zero to 0 so none shows as £-0.00
+        return _fmt_currency(value or 0)
+    if isinstance(value, str):
+        try:
+            return f"£{float(value):,.2f}"
+        except ValueError:
+            pass
+    return value
 
 @app.template_filter('date_uk')
 def date_uk_filter(value):
-    try:
+    if hasattr(value, 'strftime'):
         return value.strftime('%d/%m/%Y')
-    except Exception:
-        return value
+    return value
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,9 +1,10 @@
 # blueprints/accounts.py - Account Management Blueprint
 from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
-from app import db
-from models import Account, User, Transaction, Source
+from app import db, get_or_create_source, keyset_paginate
+from models import Account, User, Transaction
 from datetime import datetime, date
 from decimal import Decimal
+from sqlalchemy.orm import joinedload, load_only
 
 accounts_bp = Blueprint("accounts", __name__)
 
@@ -11,24 +12,30 @@ accounts_bp = Blueprint("accounts", __name__)
 @accounts_bp.route("/")
 def index():
     """List all accounts"""
-    accounts = (
-        Account.query.filter_by(is_active=True)
+    month_start = date.today().replace(day=1)
+
+    # Balances and this month's transaction counts for every account come
+    # back with the accounts in one aggregate query
+    rows = (
+        db.session.query(
+            Account,
+            db.func.coalesce(db.func.sum(Transaction.amount), 0),
+            db.func.count(db.case((Transaction.date >= month_start, 1))),
+        )
+        .outerjoin(Transaction, Transaction.account_id == Account.id)
+        .filter(Account.is_active == True)
+        .group_by(Account.id)
         .order_by(Account.created_at.desc())
         .all()
     )
 
-    # Calculate current balances and add statistics
+    accounts = []
     total_balance = 0
-    for account in accounts:
-        account.calculate_current_balance()
-        total_balance += float(account.current_balance or 0)
-
-        # Add transaction count for last 30 days
-        recent_transactions = Transaction.query.filter(
-            Transaction.account_id == account.id,
-            Transaction.date >= date.today().replace(day=1),  # This month
-        ).count()
-        account.recent_transaction_count = recent_transactions
+    for account, balance, recent_transaction_count in rows:
+        account.current_balance = balance
+        account.recent_transaction_count = recent_transaction_count
+        total_balance += float(balance)
+        accounts.append(account)
 
     return render_template(
         "accounts/index.html", accounts=accounts, total_balance=total_balance
@@ -51,39 +58,37 @@ def add():
                 flash("Selected user does not exist.")
                 return redirect(url_for("accounts.add"))
 
-            # Create new account
+            # Resolve the (cached) source before building the new objects
+            source_id = (
+                get_or_create_source("opening_balance", "Opening Balance")
+                if opening_balance != 0
+                else None
+            )
+
+            # Create new account; foreign keys are resolved through the
+            # relationships so everything is inserted in a single flush
             account = Account(
-                user_id=user_id,
+                user=user,
                 account_name=account_name,
                 account_type=account_type,
                 opening_balance=opening_balance,
                 current_balance=opening_balance,
             )
-
-            db.session.add(account)
-            db.session.flush()  # Get account ID
+            new_rows = [account]
 
             # Create opening balance transaction if amount != 0
             if opening_balance != 0:
-                # Get or create a source for opening balances
-                source = Source.query.filter_by(type="opening_balance").first()
-                if not source:
-                    source = Source(
-                        name="Opening Balance", type="opening_balance", is_active=True
-                    )
-                    db.session.add(source)
-                    db.session.flush()
-
                 opening_transaction = Transaction(
                     date=date.today(),
                     description=f"Opening balance for {account_name}",
                     amount=opening_balance,
-                    account_id=account.id,
-                    source_id=source.id,
+                    source_id=source_id,
                     source_type="opening_balance",
                 )
-                db.session.add(opening_transaction)
+                opening_transaction.account_link = account
+                new_rows.append(opening_transaction)
 
+            db.session.add_all(new_rows)
             db.session.commit()
 
             flash(
@@ -116,38 +121,56 @@ def add():
     )
 
 
+# account_id -> (version, monthly summary rows)
+_monthly_summary_cache = {}
+
+
+def get_monthly_summary(account_id):
+    """Return (transaction count, monthly breakdown) for an account
+
+    The strftime GROUP BY scans every transaction of the account, so its
+    result is reused until the account's max id, count or sum changes,
+    which the (account_id, amount) index answers without touching rows.
+    """
+    version = tuple(
+        db.session.query(
+            db.func.max(Transaction.id),
+            db.func.count(Transaction.id),
+            db.func.sum(Transaction.amount),
+        )
+        .filter(Transaction.account_id == account_id)
+        .one()
+    )
+    cached = _monthly_summary_cache.get(account_id)
+    if cached is None or cached[0] != version:
+        monthly_summary = (
+            db.session.query(
+                db.func.strftime("%Y-%m", Transaction.date).label("month"),
+                db.func.sum(Transaction.amount).label("total_amount"),
+                db.func.count(Transaction.id).label("transaction_count"),
+            )
+            .filter(Transaction.account_id == account_id)
+            .group_by("month")
+            .order_by("month")
+            .all()
+        )
+        cached = _monthly_summary_cache[account_id] = (version, monthly_summary)
+    return version[1], cached[1]
+
+
 @accounts_bp.route("/<int:id>")
 def view(id):
     """View account details and transactions"""
     account = Account.query.get_or_404(id)
     account.calculate_current_balance()
 
-    # Get pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = 25
-
-    # Get transactions for this account
-    transactions = (
-        Transaction.query.filter_by(account_id=id)
-        .order_by(Transaction.date.desc(), Transaction.id.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
+    # Get transactions for this account, a page at a time from the cursor
+    transactions = keyset_paginate(
+        db.select(Transaction).filter_by(account_id=id), per_page=25
     )
 
     # Calculate account statistics
-    total_transactions = Transaction.query.filter_by(account_id=id).count()
-
-    # Monthly breakdown
-    monthly_summary = (
-        db.session.query(
-            db.func.strftime("%Y-%m", Transaction.date).label("month"),
-            db.func.sum(Transaction.amount).label("total_amount"),
-            db.func.count(Transaction.id).label("transaction_count"),
-        )
-        .filter(Transaction.account_id == id)
-        .group_by("month")
-        .order_by("month")
-        .all()
-    )
+    total_transactions, monthly_summary = get_monthly_summary(id)
 
     # Recent activity (last 7 days)
     recent_activity = (
@@ -193,20 +216,14 @@ def edit(id):
 
                 # Create adjustment transaction
                 if difference != 0:
-                    source = Source.query.filter_by(type="adjustment").first()
-                    if not source:
-                        source = Source(
-                            name="Balance Adjustment", type="adjustment", is_active=True
-                        )
-                        db.session.add(source)
-                        db.session.flush()
+                    source_id = get_or_create_source("adjustment", "Balance Adjustment")
 
                     adjustment_transaction = Transaction(
                         date=date.today(),
                         description=f"Opening balance adjustment: £{difference:.2f}",
                         amount=difference,
                         account_id=account.id,
-                        source_id=source.id,
+                        source_id=source_id,
                         source_type="adjustment",
                     )
                     db.session.add(adjustment_transaction)
@@ -301,55 +318,58 @@ def transfer(id):
                 flash("Destination account not found.")
                 return redirect(url_for("accounts.transfer", id=id))
 
+            if to_account.id == from_account.id:
+                flash("Cannot transfer to the same account.")
+                return redirect(url_for("accounts.transfer", id=id))
+
             if amount <= 0:
                 flash("Transfer amount must be positive.")
                 return redirect(url_for("accounts.transfer", id=id))
 
+            # Both accounts' balances from one grouped SUM
+            sums = Account.live_balances_for([from_account.id, to_account.id])
+            balance = Decimal(str(sums.get(from_account.id, 0)))
+            to_balance = Decimal(str(sums.get(to_account.id, 0)))
+
             # Check sufficient balance (allow small overdraft for current accounts)
-            from_account.calculate_current_balance()
             overdraft_limit = 100 if from_account.account_type == "current" else 0
 
-            if float(from_account.current_balance) + overdraft_limit < float(amount):
+            if float(balance) + overdraft_limit < float(amount):
                 flash(
-                    f"Insufficient funds. Available: £{float(from_account.current_balance) + overdraft_limit:.2f}"
+                    f"Insufficient funds. Available: £{float(balance) + overdraft_limit:.2f}"
                 )
                 return redirect(url_for("accounts.transfer", id=id))
 
             # Create transfer source if needed
-            source = Source.query.filter_by(type="transfer").first()
-            if not source:
-                source = Source(
-                    name="Internal Transfer", type="transfer", is_active=True
-                )
-                db.session.add(source)
-                db.session.flush()
-
-            # Create debit transaction (from account)
-            debit_transaction = Transaction(
-                date=date.today(),
-                description=f"Transfer to {to_account.account_name}: {description}",
-                amount=-amount,  # Negative for debit
-                account_id=from_account.id,
-                source_id=source.id,
-                source_type="transfer",
+            source_id = get_or_create_source("transfer", "Internal Transfer")
+
+            # Insert the debit (from account) and credit (to account) legs
+            # together in one executemany
+            db.session.execute(
+                db.insert(Transaction),
+                [
+                    {
+                        "date": date.today(),
+                        "description": f"Transfer to {to_account.account_name}: {description}",
+                        "amount": -amount,  # Negative for debit
+                        "account_id": from_account.id,
+                        "source_id": source_id,
+                        "source_type": "transfer",
+                    },
+                    {
+                        "date": date.today(),
+                        "description": f"Transfer from {from_account.account_name}: {description}",
+                        "amount": amount,  # Positive for credit
+                        "account_id": to_account.id,
+                        "source_id": source_id,
+                        "source_type": "transfer",
+                    },
+                ],
             )
 
-            # Create credit transaction (to account)
-            credit_transaction = Transaction(
-                date=date.today(),
-                description=f"Transfer from {from_account.account_name}: {description}",
-                amount=amount,  # Positive for credit
-                account_id=to_account.id,
-                source_id=source.id,
-                source_type="transfer",
-            )
-
-            db.session.add(debit_transaction)
-            db.session.add(credit_transaction)
-
-            # Update balances
-            from_account.calculate_current_balance()
-            to_account.calculate_current_balance()
+            # Update balances from the known deltas instead of re-summing
+            from_account.current_balance = balance - amount
+            to_account.current_balance = to_balance + amount
 
             db.session.commit()
 
@@ -380,11 +400,30 @@ def transfer(id):
 @accounts_bp.route("/api/list")
 def api_list():
     """API endpoint for account list"""
-    accounts = Account.query.filter_by(is_active=True).all()
+    accounts = (
+        Account.query.options(
+            load_only(
+                Account.user_id,
+                Account.account_name,
+                Account.account_type,
+                Account.opening_balance,
+                Account.currency,
+                Account.created_at,
+                Account.bank_connection_id,
+            ),
+            joinedload(Account.user),
+        )
+        .filter_by(is_active=True)
+        .all()
+    )
+    # Every listed account's balance in one grouped query. The opening
+    # balance is already one of the account's transactions, so it is not
+    # added on top of the sum
+    balance_map = Account.live_balances_for([account.id for account in accounts])
 
     account_list = []
     for account in accounts:
-        account.calculate_current_balance()
+        account.current_balance = balance_map.get(account.id) or 0
         account_list.append(
             {
                 "id": account.id,
@@ -433,12 +472,15 @@ def api_summary(id):
 
     # This month's activity
     current_month_start = date.today().replace(day=1)
-    monthly_transactions = Transaction.query.filter(
-        Transaction.account_id == id, Transaction.date >= current_month_start
-    ).all()
-
-    monthly_total = sum(float(tx.amount) for tx in monthly_transactions)
-    monthly_count = len(monthly_transactions)
+    monthly_count, monthly_total = (
+        db.session.query(
+            db.func.count(Transaction.id),
+            db.func.coalesce(db.func.sum(Transaction.amount), 0),
+        )
+        .filter(Transaction.account_id == id, Transaction.date >= current_month_start)
+        .one()
+    )
+    monthly_total = float(monthly_total)
 
     return jsonify(
         {
@@ -1,24 +1,84 @@
 # blueprints/categories.py - Full CRUD operations for categories
-from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
-from app import db
+from flask import (
+    Blueprint,
+    current_app,
+    request,
+    render_template,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+)
+from sqlalchemy.orm import raiseload, selectinload
+from app import db, keyset_paginate
 from models import Category, Transaction
 from datetime import datetime
+import re
 
 categories_bp = Blueprint("categories", __name__)
 
+# Transaction month as 'YYYY-MM'. The format is a literal rather than a bound
+# parameter so SQLite can use the idx_transactions_month_category index.
+TRANSACTION_MONTH = db.func.strftime(db.literal_column("'%Y-%m'"), Transaction.date)
+
+# Simple auto-categorization rules
+CATEGORIZATION_RULES = {
+    "salary": {
+        "keywords": ["salary", "payroll", "wages"],
+        "category_name": "Salary",
+    },
+    "groceries": {
+        "keywords": ["tesco", "asda", "sainsbury", "morrisons", "aldi", "lidl"],
+        "category_name": "Groceries",
+    },
+    "fuel": {
+        "keywords": ["bp", "shell", "esso", "texaco", "petrol", "fuel"],
+        "category_name": "Transport",
+    },
+    "utilities": {
+        "keywords": ["electric", "gas", "water", "council tax"],
+        "category_name": "Utilities",
+    },
+    "internet": {
+        "keywords": ["bt", "sky", "virgin", "broadband", "internet"],
+        "category_name": "Utilities",
+    },
+}
+
+# Compiled once at import: one alternation per rule, so a single C-level
+# scan of the description replaces a Python `in` check per keyword
+_RULE_MATCHERS = [
+    (re.compile("|".join(map(re.escape, rule_data["keywords"]))), rule_data)
+    for rule_data in CATEGORIZATION_RULES.values()
+]
+
 
 @categories_bp.route("/")
 def index():
     """List all categories with full management"""
-    categories = Category.query.order_by(Category.type, Category.name).all()
+    # Counts and totals come back with the categories in one aggregate query
+    query = (
+        db.session.query(
+            Category,
+            db.func.count(Transaction.id),
+            db.func.coalesce(db.func.sum(Transaction.amount), 0),
+        )
+        .outerjoin(Transaction, Transaction.category_id == Category.id)
+        .group_by(Category.id)
+        .order_by(Category.type, Category.name)
+    )
+    if current_app.debug:
+        # Any relationship lazy load from the template fails loudly
+        query = query.options(raiseload("*"))
+    rows = query.all()
 
     # Group by type and add transaction counts
     income_categories = []
     expense_categories = []
 
-    for cat in categories:
-        cat.transaction_count = len(cat.transactions)
-        cat.total_amount = sum(float(tx.amount) for tx in cat.transactions)
+    for cat, transaction_count, total_amount in rows:
+        cat.transaction_count = transaction_count
+        cat.total_amount = float(total_amount)
 
         if cat.type == "income":
             income_categories.append(cat)
@@ -73,21 +133,31 @@ def view(id):
     per_page = 25
 
     # Get transactions for this category
-    transactions = (
-        Transaction.query.filter_by(category_id=id)
-        .order_by(Transaction.date.desc())
-        .paginate(page=page, per_page=per_page)
+    transactions = db.paginate(
+        db.select(Transaction)
+        .options(selectinload(Transaction.source))
+        .filter_by(category_id=id)
+        .order_by(Transaction.date.desc()),
+        page=page,
+        per_page=per_page,
     )
 
-    # Calculate category statistics
-    total_amount = sum(float(tx.amount) for tx in category.transactions)
-    transaction_count = len(category.transactions)
+    # Calculate category statistics in one query
+    total_amount, transaction_count = (
+        db.session.query(
+            db.func.coalesce(db.func.sum(Transaction.amount), 0),
+            db.func.count(Transaction.id),
+        )
+        .filter(Transaction.category_id == id)
+        .one()
+    )
+    total_amount = float(total_amount)
     avg_amount = total_amount / transaction_count if transaction_count > 0 else 0
 
     # Monthly breakdown
     monthly_stats = (
         db.session.query(
-            db.func.strftime("%Y-%m", Transaction.date).label("month"),
+            TRANSACTION_MONTH.label("month"),
             db.func.sum(Transaction.amount).label("total"),
             db.func.count(Transaction.id).label("count"),
         )
@@ -153,10 +223,11 @@ def delete(id):
     """Delete category (with safety checks)"""
     category = Category.query.get_or_404(id)
 
-    # Check if category has transactions
-    if category.transactions:
+    # Check if category has transactions (EXISTS stops at the first match)
+    category_transactions = Transaction.query.filter_by(category_id=id)
+    if db.session.query(category_transactions.exists()).scalar():
         flash(
-            f'Cannot delete category "{category.name}" - it has {len(category.transactions)} transactions. Please reassign transactions first.'
+            f'Cannot delete category "{category.name}" - it has {category_transactions.count()} transactions. Please reassign transactions first.'
         )
         return redirect(url_for("categories.view", id=id))
 
@@ -185,51 +256,36 @@ def delete(id):
 def bulk_categorize():
     """Bulk categorize uncategorized transactions"""
     try:
-        # Get uncategorized transactions
-        uncategorized = Transaction.query.filter_by(category_id=None).all()
-
-        categorized_count = 0
+        # Only the id and the SQLite-maintained lowercase description are
+        # needed to match rules; skip hydrating full Transaction objects
+        uncategorized = (
+            db.session.query(Transaction.id, Transaction.lower_desc)
+            .filter_by(category_id=None)
+            .all()
+        )
 
-        # Simple auto-categorization rules
-        categorization_rules = {
-            "salary": {
-                "keywords": ["salary", "payroll", "wages"],
-                "category_name": "Salary",
-            },
-            "groceries": {
-                "keywords": ["tesco", "asda", "sainsbury", "morrisons", "aldi", "lidl"],
-                "category_name": "Groceries",
-            },
-            "fuel": {
-                "keywords": ["bp", "shell", "esso", "texaco", "petrol", "fuel"],
-                "category_name": "Transport",
-            },
-            "utilities": {
-                "keywords": ["electric", "gas", "water", "council tax"],
-                "category_name": "Utilities",
-            },
-            "internet": {
-                "keywords": ["bt", "sky", "virgin", "broadband", "internet"],
-                "category_name": "Utilities",
-            },
-        }
+        # Resolve every rule's category in one query up front
+        names = {rule_data["category_name"] for rule_data in CATEGORIZATION_RULES.values()}
+        cat_id_by_name = dict(
+            db.session.query(Category.name, Category.id)
+            .filter(Category.name.in_(names))
+            .all()
+        )
 
-        for transaction in uncategorized:
-            description_lower = transaction.description.lower()
-
-            for rule_key, rule_data in categorization_rules.items():
-                if any(
-                    keyword in description_lower for keyword in rule_data["keywords"]
-                ):
-                    # Find or create category
-                    category = Category.query.filter_by(
-                        name=rule_data["category_name"]
-                    ).first()
-                    if category:
-                        transaction.category_id = category.id
-                        categorized_count += 1
+        updates = []
+        for transaction_id, description_lower in uncategorized:
+            for matcher, rule_data in _RULE_MATCHERS:
+                if matcher.search(description_lower):
+                    cat_id = cat_id_by_name.get(rule_data["category_name"])
+                    if cat_id:
+                        updates.append({"id": transaction_id, "category_id": cat_id})
                         break
 
+        if updates:
+            # ORM bulk UPDATE by primary key, one executemany
+            db.session.execute(db.update(Transaction), updates)
+        categorized_count = len(updates)
+
         db.session.commit()
         flash(f"Successfully categorized {categorized_count} transactions!")
 
@@ -248,7 +304,7 @@ def stats():
         db.session.query(
             Category.name,
             Category.color,
-            db.func.strftime("%Y-%m", Transaction.date).label("month"),
+            TRANSACTION_MONTH.label("month"),
             db.func.sum(Transaction.amount).label("total"),
         )
         .join(Transaction)
@@ -257,17 +313,19 @@ def stats():
         .all()
     )
 
-    # Top spending categories
+    # Top categories by absolute amount; the outer join keeps categories
+    # without transactions instead of silently dropping them
+    category_total = db.func.coalesce(db.func.sum(Transaction.amount), 0)
     top_categories = (
         db.session.query(
             Category.name,
             Category.color,
-            db.func.sum(Transaction.amount).label("total"),
+            category_total.label("total"),
             db.func.count(Transaction.id).label("count"),
         )
-        .join(Transaction)
+        .outerjoin(Transaction, Transaction.category_id == Category.id)
         .group_by(Category.id)
-        .order_by(db.func.sum(Transaction.amount))
+        .order_by(db.func.abs(category_total).desc())
         .limit(10)
         .all()
     )
@@ -282,14 +340,16 @@ def stats():
 
     current_month = date.today().strftime("%Y-%m")
 
+    # This month's spending for every category in one grouped query
+    actuals = dict(
+        db.session.query(Transaction.category_id, db.func.sum(Transaction.amount))
+        .filter(TRANSACTION_MONTH == current_month)
+        .group_by(Transaction.category_id)
+        .all()
+    )
+
     for category in categories_with_budgets:
-        actual_spending = (
-            db.session.query(db.func.sum(Transaction.amount))
-            .filter(Transaction.category_id == category.id)
-            .filter(db.func.strftime("%Y-%m", Transaction.date) == current_month)
-            .scalar()
-            or 0
-        )
+        actual_spending = actuals.get(category.id) or 0
 
         budget_comparison.append(
             {
@@ -318,7 +378,16 @@ def stats():
 @categories_bp.route("/api/list")
 def api_list():
     """API endpoint for category list"""
-    categories = Category.query.order_by(Category.name).all()
+    # Count transactions per category in SQL instead of loading each list
+    query = (
+        db.session.query(Category, db.func.count(Transaction.id))
+        .outerjoin(Transaction, Transaction.category_id == Category.id)
+        .group_by(Category.id)
+        .order_by(Category.name)
+    )
+    if current_app.debug:
+        query = query.options(raiseload("*"))
+    rows = query.all()
 
     return jsonify(
         [
@@ -328,12 +397,12 @@ def api_list():
                 "type": cat.type,
                 "color": cat.color,
                 "description": cat.description,
-                "transaction_count": len(cat.transactions),
+                "transaction_count": transaction_count,
                 "monthly_budget": float(cat.monthly_budget)
                 if cat.monthly_budget
                 else None,
             }
-            for cat in categories
+            for cat, transaction_count in rows
         ]
     )
 
@@ -341,13 +410,14 @@ def api_list():
 @categories_bp.route("/api/<int:id>/transactions")
 def api_category_transactions(id):
     """API endpoint for category transactions"""
-    page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
 
-    transactions = (
-        Transaction.query.filter_by(category_id=id)
-        .order_by(Transaction.date.desc())
-        .paginate(page=page, per_page=per_page)
+    # Keyset pages from the ?cursor= of the previous response; no COUNT(*)
+    transactions = keyset_paginate(
+        db.select(Transaction)
+        .options(selectinload(Transaction.source))
+        .filter_by(category_id=id),
+        per_page=per_page,
     )
 
     return jsonify(
@@ -363,10 +433,9 @@ def api_category_transactions(id):
                 for tx in transactions.items
             ],
             "pagination": {
-                "page": page,
-                "pages": transactions.pages,
-                "total": transactions.total,
                 "per_page": per_page,
+                "next_cursor": transactions.next_cursor,
+                "prev_cursor": transactions.prev_cursor,
             },
         }
     )
@@ -2,40 +2,83 @@ import csv
 from datetime import datetime
 from flask import current_app
 
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+_STRIP_COMMAS = str.maketrans("", "", ",")
+
 class TransactionHelper:
     def import_from_csv(self, csv_input):
-        from app import db, Transaction
-        imported_count = 0
-        for row in csv_input:
+        from app import db, bulk_insert_transactions
+        rows = []
+
+        # csv_input is a csv.reader; locate the columns once and index rows
+        # positionally. Absent columns point at a padding cell that reads as ''
+        header = next(csv_input, [])
+        columns = {name: i for i, name in enumerate(header)}
+        date_i = columns.get("Transaction Date", len(header))
+        description_i = columns.get("Transaction Description", len(header))
+        debit_i = columns.get("Debit Amount", len(header))
+        credit_i = columns.get("Credit Amount", len(header))
+        row_width = max(date_i, description_i, debit_i, credit_i) + 1
+
+        # Statements use one date format throughout, so try the last one
+        # that matched first
+        date_formats = DATE_FORMATS
+
+        # Blank lines are skipped
+        for row in filter(None, csv_input):
             try:
+                if len(row) < row_width:
+                    row += [""] * (row_width - len(row))
                 # Map CSV fields
-                date_str = row.get("Transaction Date")
-                description = row.get("Transaction Description")
-                debit = row.get("Debit Amount") or "0"
-                credit = row.get("Credit Amount") or "0"
+                date_str = row[date_i]
+                description = row[description_i]
+                debit = row[debit_i] or "0"
+                credit = row[credit_i] or "0"
                 # Calculate amount: credit - debit
                 try:
-                    amount = float(credit.replace(",", "")) - float(debit.replace(",", ""))
+                    amount = float(credit.translate(_STRIP_COMMAS)) - float(debit.translate(_STRIP_COMMAS))
                 except Exception:
                     amount = 0
                 # Parse date (try common formats)
                 date = None
-                for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+                for fmt in date_formats:
                     try:
                         date = datetime.strptime(date_str, fmt).date()
-                        break
-                    except Exception:
+                    except ValueError:
                         continue
-                # Create transaction
-                transaction = Transaction(
-                    date=date,
-                    description=description,
-                    amount=amount,
-                    category_id=None
-                )
-                db.session.add(transaction)
-                imported_count += 1
+                    if fmt is not date_formats[0]:
+                        date_formats = (fmt,) + tuple(f for f in DATE_FORMATS if f != fmt)
+                    break
+                if date is None:
+                    current_app.logger.error(f"Skipping row with invalid date: {row}")
+                    continue
+                # Collect plain values; inserted together once parsing is done
+                rows.append({
+                    "date": date,
+                    "description": description,
+                    "amount": amount,
+                    "category_id": None,
+                })
             except Exception as e:
                 current_app.logger.error(f"Error importing row: {row} - {e}")
-        db.session.commit()
+                continue
+        # All rows or none: one commit after every batch is in
+        try:
+            imported_count = bulk_insert_transactions(rows, commit=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         return imported_count
+
+    def bulk_update_categories(self, transaction_ids, category_id):
+        from app import db, Transaction
+        # One UPDATE for the whole selection; an empty category clears it
+        result = db.session.execute(
+            db.update(Transaction)
+            .where(Transaction.id.in_(transaction_ids))
+            .values(category_id=int(category_id) if category_id else None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
@@ -13,6 +13,15 @@ from markupsafe import Markup
 transactions_bp = Blueprint("transactions", __name__, url_prefix="/transactions")
 
 
+def fts_match_query(search):
+    """Quote a search box entry as one FTS5 phrase.
+
+    Against the trigram-tokenized transactions_fts this matches the text as
+    a case-insensitive substring, like LIKE '%search%' did.
+    """
+    return '"%s"' % search.replace('"', '""')
+
+
 @transactions_bp.route("/")
 def list_transactions():
     page = request.args.get("page", 1, type=int)
@@ -21,32 +30,53 @@ def list_transactions():
     search_query = request.args.get("search", "")
 
     try:
-        from app import db, Transaction, Category
+        from app import db, Transaction, all_categories, count_transactions
+        from sqlalchemy.orm import joinedload
 
-        query = Transaction.query.join(
-            Category, Transaction.category_id == Category.id, isouter=True
-        )
+        criteria = []
         if category_filter:
-            query = query.filter(Transaction.category_id == category_filter)
-        if search_query:
-            search_param = f"%{search_query}%"
-            from sqlalchemy import or_
-            query = query.filter(
-                or_(
-                    Transaction.description.like(search_param),
-                    getattr(Transaction, "reference", "").like(search_param),
+            criteria.append(Transaction.category_id == category_filter)
+        if len(search_query) >= 3 and search_query.strip():
+            # Look the text up in the transactions_fts trigram index (see
+            # migrate_database.py) instead of scanning with LIKE '%q%'
+            matches = (
+                db.text(
+                    "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH :q"
                 )
+                .bindparams(q=fts_match_query(search_query))
+                .columns(db.column("rowid"))
             )
-        query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
-        categories_list = Category.query.order_by(Category.name).all()
+            criteria.append(Transaction.id.in_(matches))
+        elif search_query.strip():
+            # Too short to form a trigram; fall back to a LIKE scan (a
+            # leading wildcard cannot use an index). % and _ are escaped so
+            # they match literally, as they do in the FTS phrase above
+            criteria.append(
+                db.or_(
+                    Transaction.description.contains(search_query, autoescape=True),
+                    Transaction.reference.contains(search_query, autoescape=True),
+                )
+            )
+
+        # The category is shown on every row; load it in the same query
+        query = (
+            Transaction.query.options(joinedload(Transaction.category))
+            .filter(*criteria)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+        )
+        # The total comes from the shared count cache, not a COUNT per page
+        paginated = query.paginate(
+            page=page, per_page=per_page, error_out=False, count=False
+        )
+        total = count_transactions(("list", category_filter, search_query), *criteria)
+        categories_list = all_categories()
         return render_template(
             "transactions.html",
             transactions=paginated.items,
             categories=categories_list,
             current_page=page,
-            total_pages=paginated.pages,
-            total_transactions=paginated.total,
+            total_pages=-(-total // per_page),
+            total_transactions=total,
             category_filter=category_filter,
             search_query=search_query,
         )
@@ -67,11 +97,12 @@ def import_transactions():
             return redirect(request.url)
         if file and file.filename.lower().endswith(".csv"):
             try:
+                import codecs
                 import csv
-                import io
 
-                stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-                csv_input = csv.DictReader(stream)
+                # Decode the upload line by line rather than reading it all
+                # into memory; utf-8-sig drops a spreadsheet's BOM
+                csv_input = csv.reader(codecs.iterdecode(file.stream, "utf-8-sig"))
                 imported_count = current_app.transaction_helper.import_from_csv(
                     csv_input
                 )
@@ -142,9 +173,9 @@ def categorize():
         grouped = current_app.transaction_helper.group_transactions_by_description(
             items
         )
-        from app import Category
+        from app import all_categories
 
-        categories_list = Category.query.order_by(Category.name).all()
+        categories_list = all_categories()
         return render_template(
             "categorize.html",
             grouped_transactions=grouped,
@@ -167,15 +198,17 @@ def update_category(transaction_id):
             transaction_id, category_id
         )
         if transaction and category_id:
-            from app import Transaction
+            from app import db, Transaction
 
-            similar_count = Transaction.query.filter(
-                current_app.db.func.lower(Transaction.description)
-                == transaction.description.lower(),
-                Transaction.category_id.is_(None),
-                Transaction.id != transaction_id,
-            ).count()
-            if similar_count > 0:
+            # Only whether a match exists matters; stop at the first one
+            has_similar = db.session.query(
+                db.exists().where(
+                    Transaction.lower_desc == db.func.lower(transaction.description),
+                    Transaction.category_id.is_(None),
+                    Transaction.id != transaction_id,
+                )
+            ).scalar()
+            if has_similar:
                 button_html = Markup(
                     "Transaction categorized successfully."
                     "<div class='mt-2'>"
@@ -204,22 +237,29 @@ def apply_same():
         category_id = data.get("category_id")
         if not category_id or (not transaction_id and not transaction_ids):
             return jsonify({"error": "Missing parameters"}), 400
-        from app import Transaction
+        from app import db, Transaction
         src_ids = []
         if transaction_ids:
             src_ids = [int(i) for i in transaction_ids if i]
         elif transaction_id:
             src_ids = [int(transaction_id)]
-        source_transactions = Transaction.query.filter(
-            Transaction.id.in_(src_ids)
-        ).all()
-        total_updated = 0
-        for trans in source_transactions:
-            if trans.description:
-                count = current_app.transaction_helper.apply_category_to_similar(
-                    trans.description, category_id, exclude_ids=src_ids
-                )
-                total_updated += count
+        # One UPDATE for every source description: match on the indexed
+        # lowercase description of the source rows, read in a subquery
+        source_descriptions = db.select(Transaction.lower_desc).where(
+            Transaction.id.in_(src_ids), Transaction.description != ""
+        )
+        result = db.session.execute(
+            db.update(Transaction)
+            .where(
+                Transaction.lower_desc.in_(source_descriptions),
+                Transaction.category_id.is_(None),
+                Transaction.id.notin_(src_ids),
+            )
+            .values(category_id=int(category_id))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total_updated = result.rowcount
         return jsonify({"updated": total_updated})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
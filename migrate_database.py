@@ -4,6 +4,17 @@ import os
 from datetime import datetime
 
 
+def copy_database(src_path, dst_path):
+    """Copy a SQLite database with the backup API so pages still in the WAL are included"""
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dst_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
 def migrate_database():
     """Add missing tables to existing banking.db while preserving all data"""
 
@@ -20,9 +31,7 @@ def migrate_database():
     backup_name = f"banking_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
     print(f"📁 Creating backup: {backup_name}")
 
-    import shutil
-
-    shutil.copy2("banking.db", backup_name)
+    copy_database("banking.db", backup_name)
     print(f"✅ Backup created successfully!")
 
     # Connect to database
@@ -38,10 +47,14 @@ def migrate_database():
         # Add missing tables
         tables_to_add = []
 
+        # Schema changes are collected here and run as one script in a
+        # single transaction after every check has been made
+        schema_sql = []
+
         # 1. Users table
         if "users" not in existing_tables:
             print("\n➕ Adding users table...")
-            cursor.execute("""
+            schema_sql.append("""
                 CREATE TABLE users (
                     id INTEGER PRIMARY KEY,
                     username VARCHAR(80) UNIQUE NOT NULL,
@@ -57,7 +70,7 @@ def migrate_database():
         # 2. Accounts table
         if "accounts" not in existing_tables:
             print("➕ Adding accounts table...")
-            cursor.execute("""
+            schema_sql.append("""
                 CREATE TABLE accounts (
                     id INTEGER PRIMARY KEY,
                     user_id INTEGER NOT NULL,
@@ -77,28 +90,37 @@ def migrate_database():
 
         # 3. Add columns to existing transactions table if needed
         print("\n🔧 Checking transactions table structure...")
-        cursor.execute("PRAGMA table_info(transactions)")
+        # table_xinfo also lists generated columns, which table_info hides
+        cursor.execute("PRAGMA table_xinfo(transactions)")
         transaction_columns = [col[1] for col in cursor.fetchall()]
 
         # Add account_id column if missing
         if "account_id" not in transaction_columns:
             print("➕ Adding account_id column to transactions...")
-            cursor.execute("ALTER TABLE transactions ADD COLUMN account_id INTEGER")
+            schema_sql.append("ALTER TABLE transactions ADD COLUMN account_id INTEGER")
 
         # Add is_projected column if missing
         if "is_projected" not in transaction_columns:
             print("➕ Adding is_projected column to transactions...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE transactions ADD COLUMN is_projected BOOLEAN DEFAULT 0"
             )
 
         # Add recurring_pattern_id column if missing
         if "recurring_pattern_id" not in transaction_columns:
             print("➕ Adding recurring_pattern_id column to transactions...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE transactions ADD COLUMN recurring_pattern_id INTEGER"
             )
 
+        # Add lower_desc generated column if missing
+        if "lower_desc" not in transaction_columns:
+            print("➕ Adding lower_desc column to transactions...")
+            schema_sql.append(
+                "ALTER TABLE transactions ADD COLUMN lower_desc TEXT"
+                " GENERATED ALWAYS AS (lower(description)) VIRTUAL"
+            )
+
         # 4. Update categories table with new columns
         print("\n🔧 Updating categories table...")
         cursor.execute("PRAGMA table_info(categories)")
@@ -107,14 +129,14 @@ def migrate_database():
         # Add monthly_budget column if missing
         if "monthly_budget" not in category_columns:
             print("➕ Adding monthly_budget column to categories...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE categories ADD COLUMN monthly_budget NUMERIC(10, 2)"
             )
 
         # Add is_recurring column if missing
         if "is_recurring" not in category_columns:
             print("➕ Adding is_recurring column to categories...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE categories ADD COLUMN is_recurring BOOLEAN DEFAULT 0"
             )
 
@@ -124,48 +146,145 @@ def migrate_database():
 
         if "category_id" not in pattern_columns:
             print("➕ Adding category_id column to recurring_patterns...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE recurring_patterns ADD COLUMN category_id INTEGER"
             )
 
         if "is_active" not in pattern_columns:
             print("➕ Adding is_active column to recurring_patterns...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE recurring_patterns ADD COLUMN is_active BOOLEAN DEFAULT 1"
             )
 
         if "confidence_score" not in pattern_columns:
             print("➕ Adding confidence_score column to recurring_patterns...")
-            cursor.execute(
+            schema_sql.append(
                 "ALTER TABLE recurring_patterns ADD COLUMN confidence_score REAL DEFAULT 0.0"
             )
 
-        # 6. Create default user and account for existing transactions
+        # 6. Indexes for transaction lookups, sorting and balance sums
+        print("\n🔧 Checking transaction indexes...")
+        # (date, id) covers everything the old date-only index served
+        schema_sql.append("DROP INDEX IF EXISTS idx_transactions_date")
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_date_id ON transactions (date, id)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category_id)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions (source_id)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions (account_id, date)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_account_amount ON transactions (account_id, amount)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_month_category ON transactions (strftime('%Y-%m', date), category_id, amount)"
+        )
+        schema_sql.append(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_lower_desc ON transactions (lower_desc)"
+        )
+
+        # 7. Full-text search over descriptions and references. The trigram
+        # tokenizer lets MATCH find any substring of 3+ characters
+        print("\n🔧 Checking transaction search index...")
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='transactions_fts'"
+        )
+        fts_table = cursor.fetchone()
+        if fts_table is None or "trigram" not in fts_table[0]:
+            if fts_table is not None:
+                # Built with the default word tokenizer; replace it
+                print("🔄 Rebuilding transactions_fts with the trigram tokenizer...")
+                schema_sql.append("DROP TABLE transactions_fts")
+            else:
+                print("➕ Creating transactions_fts search index...")
+            schema_sql.append("""
+                CREATE VIRTUAL TABLE transactions_fts USING fts5(
+                    description, reference,
+                    content='transactions', content_rowid='id',
+                    tokenize='trigram'
+                )
+            """)
+            # Index the rows that already exist
+            schema_sql.append(
+                "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')"
+            )
+
+        # Keep the external-content index in step with the transactions table
+        schema_sql.append("""
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_insert
+            AFTER INSERT ON transactions BEGIN
+                INSERT INTO transactions_fts (rowid, description, reference)
+                VALUES (new.id, new.description, new.reference);
+            END
+        """)
+        schema_sql.append("""
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_delete
+            AFTER DELETE ON transactions BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description, reference)
+                VALUES ('delete', old.id, old.description, old.reference);
+            END
+        """)
+        schema_sql.append("""
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+            AFTER UPDATE OF description, reference ON transactions BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description, reference)
+                VALUES ('delete', old.id, old.description, old.reference);
+                INSERT INTO transactions_fts (rowid, description, reference)
+                VALUES (new.id, new.description, new.reference);
+            END
+        """)
+
+        # The script opens a transaction and leaves it open, so the data
+        # changes below commit or roll back together with the DDL
+        print("\n🔧 Applying schema changes...")
+        cursor.executescript("BEGIN;\n" + ";\n".join(schema_sql) + ";")
+
+        # 8. Create default user and account for existing transactions
         print("\n👤 Creating default user and account...")
 
-        # Create default user
         cursor.execute(
-            """
-            INSERT INTO users (username, email, first_name, last_name, created_at)
-            VALUES ('default.user', 'user@example.com', 'Default', 'User', ?)
-        """,
-            (datetime.now(),),
+            "SELECT id FROM users WHERE username = 'default.user' OR email = 'user@example.com'"
         )
+        row = cursor.fetchone()
+        if row:
+            default_user_id = row[0]
+            print(f"✅ Default user already exists with ID: {default_user_id}")
+        else:
+            cursor.execute(
+                """
+                INSERT INTO users (username, email, first_name, last_name, created_at)
+                VALUES ('default.user', 'user@example.com', 'Default', 'User', ?)
+            """,
+                (datetime.now(),),
+            )
 
-        default_user_id = cursor.lastrowid
-        print(f"✅ Created default user with ID: {default_user_id}")
+            default_user_id = cursor.lastrowid
+            print(f"✅ Created default user with ID: {default_user_id}")
 
-        # Create default account
         cursor.execute(
-            """
-            INSERT INTO accounts (user_id, account_name, account_type, opening_balance, current_balance, created_at)
-            VALUES (?, 'Main Account', 'current', 0.00, 0.00, ?)
-        """,
-            (default_user_id, datetime.now()),
+            "SELECT id FROM accounts WHERE user_id = ? AND account_name = 'Main Account'",
+            (default_user_id,),
         )
+        row = cursor.fetchone()
+        if row:
+            default_account_id = row[0]
+            print(f"✅ Default account already exists with ID: {default_account_id}")
+        else:
+            cursor.execute(
+                """
+                INSERT INTO accounts (user_id, account_name, account_type, opening_balance, current_balance, created_at)
+                VALUES (?, 'Main Account', 'current', 0.00, 0.00, ?)
+            """,
+                (default_user_id, datetime.now()),
+            )
 
-        default_account_id = cursor.lastrowid
-        print(f"✅ Created default account with ID: {default_account_id}")
+            default_account_id = cursor.lastrowid
+            print(f"✅ Created default account with ID: {default_account_id}")
 
         # Link all existing transactions to default account
         print("🔗 Linking existing transactions to default account...")
@@ -181,21 +300,24 @@ def migrate_database():
         transactions_updated = cursor.rowcount
         print(f"✅ Linked {transactions_updated} transactions to default account")
 
-        # Calculate and update account balance based on transactions
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE account_id = ?",
-            (default_account_id,),
-        )
-        total_balance = cursor.fetchone()[0] or 0
-
+        # Set the account balance from its transactions in the same statement;
+        # the sum is read through idx_transactions_account_amount
         cursor.execute(
             """
             UPDATE accounts
-            SET current_balance = ?, opening_balance = 0.00
+            SET current_balance = (
+                    SELECT COALESCE(SUM(amount), 0)
+                    FROM transactions
+                    WHERE account_id = accounts.id
+                )
             WHERE id = ?
         """,
-            (total_balance, default_account_id),
+            (default_account_id,),
         )
+        cursor.execute(
+            "SELECT current_balance FROM accounts WHERE id = ?", (default_account_id,)
+        )
+        total_balance = cursor.fetchone()[0]
 
         print(f"✅ Updated account balance to £{total_balance:.2f}")
 
@@ -208,8 +330,8 @@ def migrate_database():
         print(
             f"  • Tables added: {', '.join(tables_to_add) if tables_to_add else 'None (already existed)'}"
         )
-        print(f"  • Default user created: default.user")
-        print(f"  • Default account created: Main Account")
+        print(f"  • Default user: default.user")
+        print(f"  • Default account: Main Account")
         print(f"  • Transactions linked: {transactions_updated}")
         print(f"  • Account balance: £{total_balance:.2f}")
         print(f"  • Backup saved as: {backup_name}")
@@ -232,10 +354,11 @@ def migrate_database():
     except Exception as e:
         print(f"\n❌ Migration failed: {str(e)}")
         conn.rollback()
+        conn.close()
 
         # Restore backup
         print(f"🔄 Restoring backup from {backup_name}...")
-        shutil.copy2(backup_name, "banking.db")
+        copy_database(backup_name, "banking.db")
         print("✅ Database restored from backup")
 
         return False
@@ -15,6 +15,7 @@ def define_models(db):
             "Account",
             back_populates="user",
             cascade="all, delete-orphan",
+            lazy="selectin",
         )
         @property
         def full_name(self):
@@ -27,6 +28,7 @@ def define_models(db):
         type = db.Column(db.String(50), nullable=False)
         is_active = db.Column(db.Boolean, default=True)
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
+        transactions = db.relationship("Transaction", back_populates="source")
 
     class Category(db.Model):
         __tablename__ = "categories"
@@ -40,20 +42,48 @@ def define_models(db):
         monthly_budget = db.Column(db.Numeric(10, 2))
         is_recurring = db.Column(db.Boolean, default=False)
         subcategories = db.relationship("Category", remote_side=[id])
-        transactions = db.relationship("Transaction", backref="category")
+        transactions = db.relationship("Transaction", back_populates="category")
 
     class Transaction(db.Model):
         __tablename__ = "transactions"
+        __table_args__ = (
+            # Keyset pagination orders and seeks on (date, id); date-only
+            # filters and sorts use the same index
+            db.Index("idx_transactions_date_id", "date", "id"),
+            db.Index("idx_transactions_external_id", "external_id"),
+            db.Index("idx_transactions_category", "category_id"),
+            db.Index("idx_transactions_source", "source_id"),
+            # Per-account date ranges and newest-first account listings
+            db.Index("idx_transactions_account_date", "account_id", "date"),
+            # Monthly per-category totals; queries must spell the month as
+            # strftime('%Y-%m', date) with a literal format to match it
+            db.Index(
+                "idx_transactions_month_category",
+                db.text("strftime('%Y-%m', date)"),
+                "category_id",
+                "amount",
+            ),
+            # Covers the per-account SUM(amount) balance aggregates
+            db.Index("idx_transactions_account_amount", "account_id", "amount"),
+            db.Index("idx_transactions_lower_desc", "lower_desc"),
+        )
         id = db.Column(db.Integer, primary_key=True)
         external_id = db.Column(db.String(255))
         date = db.Column(db.Date, nullable=False)
         description = db.Column(db.Text, nullable=False)
+        # Lowercased description for keyword matching, maintained by SQLite.
+        # VIRTUAL because ALTER TABLE cannot add a STORED generated column
+        lower_desc = db.Column(
+            db.Text, db.Computed("lower(description)", persisted=False)
+        )
         amount = db.Column(db.Numeric(10, 2), nullable=False)
         balance = db.Column(db.Numeric(10, 2))
         category_id = db.Column(db.Integer, db.ForeignKey("categories.id"))
         source_id = db.Column(db.Integer, db.ForeignKey("sources.id"))
         source_type = db.Column(db.String(50))
-        raw_data = db.Column(db.Text)
+        # Provider payload, only read when debugging a sync; keep it out of
+        # ordinary SELECTs
+        raw_data = db.deferred(db.Column(db.Text))
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(
             db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -63,8 +93,11 @@ def define_models(db):
         account_id = db.Column(db.Integer, db.ForeignKey("accounts.id"))
         is_projected = db.Column(db.Boolean, default=False)
         recurring_pattern_id = db.Column(db.Integer)
-        source = db.relationship("Source", backref="transactions")
-        account_link = db.relationship("Account", backref="account_transactions")
+        category = db.relationship("Category", back_populates="transactions")
+        source = db.relationship("Source", back_populates="transactions")
+        account_link = db.relationship(
+            "Account", back_populates="account_transactions"
+        )
 
     class RecurringPattern(db.Model):
         __tablename__ = "recurring_patterns"
@@ -95,14 +128,31 @@ def define_models(db):
         bank_connection_id = db.Column(db.String(255))
         external_account_id = db.Column(db.String(255))
         user = db.relationship("User", back_populates="accounts")
-        def get_live_balance(self):
-            total_transactions = (
-                db.session.query(db.func.sum(Transaction.amount))
-                .filter(Transaction.account_id == self.id)
-                .scalar()
-                or 0
+        account_transactions = db.relationship(
+            "Transaction", back_populates="account_link"
+        )
+
+        # The opening balance is posted as a transaction when an account is
+        # created (and adjusted by one when edited), so an account's balance
+        # is the sum of its transactions; opening_balance is not added again
+        @staticmethod
+        def live_balances_for(account_ids=None):
+            """Return {account_id: transaction total} from a single GROUP BY"""
+            # Sum whole pence as INTEGER in SQL and convert once per account
+            pence = db.cast(db.func.round(Transaction.amount * 100), db.Integer)
+            query = db.session.query(
+                Transaction.account_id,
+                db.func.coalesce(db.func.sum(pence), 0),
             )
-            return float(self.opening_balance or 0) + float(total_transactions)
+            if account_ids is not None:
+                query = query.filter(Transaction.account_id.in_(account_ids))
+            return {
+                account_id: total / 100
+                for account_id, total in query.group_by(Transaction.account_id)
+            }
+
+        def get_live_balance(self):
+            return float(Account.live_balances_for([self.id]).get(self.id, 0))
 
     return User, Source, Category, Transaction, RecurringPattern, Account
 